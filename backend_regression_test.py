@@ -5,101 +5,304 @@ Tests all major endpoints after massive backend refactoring (Sprints 1-6)
 Architecture: 50 files, 21 routers, 102+ endpoints, 11 services, 75+ models
 """
 
+import argparse
+import itertools
+import os
 import requests
 import sys
-import json
+import logging
+import threading
 import time
-from datetime import datetime
+from urllib.parse import quote
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from common_http import (_dumps, _loads, load_cached_token, reuse_tokens_enabled, save_cached_token,
+                         token_cache_path, token_is_valid)
+
+logger = logging.getLogger("digikawsay.regression")
+
+# Cassette used when --cassette is given without a path; ignored by git alongside the token caches
+DEFAULT_CASSETTE_PATH = "regression_cassette.json"
+# Stands in for recorded access tokens; replayed responses never authenticate against a live backend
+REDACTED_TOKEN = "REDACTED"
+
+# Static request bodies, serialized once at import instead of on every call
+ADMIN_LOGIN_BODY = _dumps({"email": "admin@test.com", "password": "test123"})
+ACME_LOGIN_BODY = _dumps({"email": "admin@acme.com.co", "password": "acme2025"})
+# Invariant parts of the create-user payloads; only the email is spliced in per request
+REGISTER_BODY_PREFIX = _dumps({
+    "password": "test123",
+    "full_name": "Test User Regression",
+    "role": "participant"
+})[:-1]
+CREATE_USER_BODY_PREFIX = _dumps({
+    "password": "test123456",  # 8+ characters required
+    "full_name": "API Created User",
+    "role": "participant"
+})[:-1]
+
+# Endpoints that embed an ID; IDs are percent-escaped when filled in
+_ROUTES = {
+    "user": "users/{id}",
+    "campaign": "campaigns/{id}",
+    "campaign_coverage": "campaigns/{id}/coverage",
+    "campaign_insights": "insights/campaign/{id}",
+    "campaign_network": "network/campaign/{id}",
+    "network_snapshots": "network/snapshots/{id}",
+    "campaign_initiatives": "initiatives/campaign/{id}",
+}
+
+
+def _route(name: str, resource_id: str) -> str:
+    """Fill an ID into a route template"""
+    return _ROUTES[name].format_map({"id": quote(str(resource_id), safe="")})
+
+
+def _with_email(prefix: bytes, email: str) -> bytes:
+    """Complete a pre-serialized payload prefix with an email field"""
+    return prefix + b',"email":' + _dumps(email) + b'}'
+
+# Fail fast on connect, allow slower endpoints time to respond
+REQUEST_TIMEOUT = (3.05, 15)
+# Consecutive connection failures after which remaining requests are skipped
+MAX_CONNECTION_FAILURES = 3
 
 class DigiKawsayRegressionTester:
-    def __init__(self, base_url="https://runa-insights.preview.emergentagent.com"):
+    __slots__ = ('base_url', 'max_concurrency', 'request_slots', 'session', 'api_url', 'urls',
+                 'auth_headers', 'connection_failures', 'failure_lock', 'token_cache_path',
+                 'cassette_path', 'cassette', 'mode', 'reuse_tokens', 'admin_token', 'participant_token',
+                 'tests_run', 'tests_passed', 'failed_tests', 'section', 'section_counts',
+                 'campaign_id', 'user_id', 'uid')
+
+    def __init__(self, base_url="https://runa-insights.preview.emergentagent.com",
+                 cassette_path: str = None, rerecord: bool = False, max_concurrency: int = 8):
         self.base_url = base_url
+        # Caps in-flight requests so concurrent sections don't flood the shared preview backend
+        self.max_concurrency = max_concurrency
+        self.request_slots = threading.BoundedSemaphore(max_concurrency)
+        # One keep-alive session so every request reuses the same TLS connection
+        self.session = requests.Session()
+        self.session.headers['Content-Type'] = 'application/json'
+        # Ride out transient gateway errors from the preview host instead of failing the test; only urllib3's
+        # default idempotent methods are retried, so user-creating POSTs and PATCH updates are never replayed
+        retries = Retry(total=3, backoff_factor=0.2, backoff_jitter=0.1, status_forcelist=[502, 503, 504],
+                        raise_on_status=False)
+        # Size the pool to the concurrency cap so parallel GETs never discard connections
+        adapter = HTTPAdapter(pool_maxsize=max(max_concurrency, 10), max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.api_url = f"{base_url}/api"
+        self.urls = {}
+        self.auth_headers = {}
+        # Updated from batch_get worker threads, so the circuit-breaker count is guarded
+        self.connection_failures = 0
+        self.failure_lock = threading.Lock()
+        # Token cache file shared with the other suites (entries keyed by email, written owner-only)
+        self.token_cache_path = token_cache_path(base_url)
+        self.cassette_path = cassette_path
+        self.cassette = {}
+        self.mode = None
+        if cassette_path:
+            # Replay an existing cassette unless asked to record a fresh one
+            if os.path.exists(cassette_path) and not rerecord:
+                self.mode = "replay"
+                with open(cassette_path, "rb") as f:
+                    self.cassette = _loads(f.read())
+            else:
+                self.mode = "record"
+        # Cached tokens skip the login flow, so CI runs keep exercising it unless opted in
+        self.reuse_tokens = self.mode is None and reuse_tokens_enabled()
         self.admin_token = None
         self.participant_token = None
         self.tests_run = 0
         self.tests_passed = 0
         self.failed_tests = []
+        self.section = None
+        self.section_counts = Counter()
         self.campaign_id = None
         self.user_id = None
+        # Unique suffixes for generated emails, safe when requests run concurrently
+        self.uid = itertools.count(int(time.time()) * 1000)
+
+    def start_section(self, icon: str, title: str):
+        """Print a section header and attribute following results to it"""
+        self.section = title
+        logger.info(f"\n{icon} {title}")
+        logger.info("-" * 50)
 
     def log_test(self, name: str, success: bool, details: str = ""):
         """Log test result"""
         self.tests_run += 1
+        self.section_counts[self.section, success] += 1
         if success:
             self.tests_passed += 1
-            print(f"✅ {name}")
+            logger.info(f"✅ {name}")
             if details:
-                print(f"   {details}")
+                logger.info(f"   {details}")
         else:
-            print(f"❌ {name}")
+            logger.info(f"❌ {name}")
             if details:
-                print(f"   {details}")
+                logger.info(f"   {details}")
             self.failed_tests.append({"name": name, "details": details})
 
-    def make_request(self, method: str, endpoint: str, data: Dict = None, 
-                    auth_token: str = None, expected_status: int = 200) -> tuple:
-        """Make HTTP request and return success status and response data"""
-        url = f"{self.base_url}/api/{endpoint}"
-        headers = {'Content-Type': 'application/json'}
-        
-        if auth_token:
-            headers['Authorization'] = f'Bearer {auth_token}'
+    def log_skip(self, name: str, missing: str):
+        """Note tests that were not run because an earlier step did not provide their input"""
+        logger.info(f"⏭️ SKIPPED {name} (missing {missing})")
+
+    def log_reused(self, name: str, details: str = ""):
+        """Report a check satisfied without a request of its own; it is not counted as a test of this run"""
+        logger.info(f"⏭️ REUSED {name} ({details}, not counted)")
+
+    def get_headers(self, auth_token: str = None) -> Dict[str, str]:
+        """Return the per-call headers for a token, built once per token (session headers cover the rest)"""
+        headers = self.auth_headers.get(auth_token)
+        if headers is None:
+            headers = {'Authorization': f'Bearer {auth_token}'} if auth_token else {}
+            self.auth_headers[auth_token] = headers
+        return headers
+
+    def make_request(self, method: str, endpoint: str, data: Any = None, 
+                    auth_token: str = None, expected_status: int = 200,
+                    parse_body: bool = True) -> tuple:
+        """Make HTTP request and return success status and response data (None if parse_body is False)"""
+        url = self.urls.get(endpoint)
+        if url is None:
+            url = self.urls[endpoint] = f"{self.api_url}/{endpoint}"
+        headers = self.get_headers(auth_token)
+
+        # Pre-serialized bodies (bytes) are sent as-is
+        body = data if data is None or isinstance(data, bytes) else _dumps(data)
+
+        if self.connection_failures >= MAX_CONNECTION_FAILURES:
+            return False, {"error": "Skipped: backend unreachable"}
 
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=15)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=15)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=headers, timeout=15)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, timeout=15)
+            if self.mode == "replay":
+                response = self.replay_response(method, endpoint)
+            else:
+                with self.request_slots:
+                    response = self.session.request(method, url, data=body, headers=headers,
+                                                    timeout=REQUEST_TIMEOUT)
+                with self.failure_lock:
+                    self.connection_failures = 0
+
+            if self.mode == "record":
+                self.cassette.setdefault(f"{method} {endpoint}", []).append({
+                    "status": response.status_code,
+                    "body": response.content.decode("utf-8", errors="replace")
+                })
 
             success = response.status_code == expected_status
             
             if success:
-                try:
-                    return True, response.json()
-                except:
+                if not parse_body:
+                    response.close()
+                    return True, None
+                # Skip the decode outright for empty or non-JSON bodies (replayed responses carry no headers)
+                content_type = response.headers.get('Content-Type')
+                if response.headers.get('Content-Length') == '0' or (
+                        content_type is not None and 'json' not in content_type):
                     return True, {"status": "ok"}
+                else:
+                    try:
+                        return True, _loads(response.content)
+                    except ValueError:  # empty or non-JSON body
+                        return True, {"status": "ok"}
             else:
                 return False, {
                     "status_code": response.status_code,
-                    "error": response.text[:200]
+                    "error": response.content[:200].decode("utf-8", errors="replace")
                 }
 
+        except (requests.ConnectionError, requests.Timeout) as e:
+            with self.failure_lock:
+                self.connection_failures += 1
+            return False, {"error": str(e)}
         except Exception as e:
             return False, {"error": str(e)}
 
+    def warmup(self) -> bool:
+        """Open the pooled connection (DNS, TCP, TLS) before the timed run; False if the backend is unreachable"""
+        if self.mode == "replay":
+            return True
+        try:
+            self.session.head(self.api_url, timeout=REQUEST_TIMEOUT[0]).close()
+        except (requests.ConnectionError, requests.Timeout):
+            return False
+        except requests.RequestException:
+            pass
+        return True
+
+    def batch_get(self, endpoints: List[str], auth_token: str = None,
+                  public: frozenset = frozenset()) -> List[tuple]:
+        """Issue independent GETs concurrently and return their results in request order (public ones without the token)"""
+        with ThreadPoolExecutor(max_workers=min(len(endpoints), self.max_concurrency)) as pool:
+            return list(pool.map(
+                lambda endpoint: self.make_request(
+                    "GET", endpoint, auth_token=None if endpoint in public else auth_token),
+                endpoints))
+
+    def replay_response(self, method: str, endpoint: str) -> requests.Response:
+        """Build the next recorded response for a request without touching the network"""
+        recorded = self.cassette.get(f"{method} {endpoint}")
+        if not recorded:
+            raise LookupError(f"No recorded response for {method} {endpoint}")
+        entry = recorded.pop(0)
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = entry["body"].encode("utf-8")
+        response._content_consumed = True
+        return response
+
+    def save_cassette(self):
+        """Write recorded responses to the cassette file, with access tokens redacted"""
+        if self.mode == "record":
+            for entries in self.cassette.values():
+                for entry in entries:
+                    entry["body"] = redact_access_token(entry["body"])
+            with open(self.cassette_path, "wb") as f:
+                f.write(_dumps(self.cassette))
+            logger.info(f"📼 Recorded cassette: {self.cassette_path}")
+
     def test_authentication_security(self):
         """Test Authentication and Security endpoints"""
-        print(f"\n🔐 1. AUTHENTICATION AND SECURITY")
-        print("-" * 50)
-
-        # Test admin login
-        success, response = self.make_request(
-            "POST", "auth/login", 
-            {"email": "admin@test.com", "password": "test123"},
-            expected_status=200
-        )
-        
-        if success and 'access_token' in response:
-            self.admin_token = response['access_token']
-            user_data = response.get('user', {})
-            self.log_test(
-                "Admin Login (admin@test.com)", 
-                True, 
-                f"Role: {user_data.get('role')}, Email: {user_data.get('email')}"
-            )
+        self.start_section("🔐", "1. AUTHENTICATION AND SECURITY")
+
+        # Test admin login (reusing a cached token from a previous run when still valid)
+        cached_token = load_cached_token(self.token_cache_path, "admin@test.com") if self.reuse_tokens else None
+        # A revoked token or one from a reseeded database falls back to a fresh login
+        if cached_token and token_is_valid(f"{self.api_url}/", cached_token, self.session):
+            self.admin_token = cached_token
+            self.log_reused("Admin Login (admin@test.com)", "cached token")
         else:
-            self.log_test("Admin Login (admin@test.com)", False, str(response))
-            return False
+            success, response = self.make_request(
+                "POST", "auth/login", 
+                ADMIN_LOGIN_BODY,
+                expected_status=200
+            )
+            
+            if success and 'access_token' in response:
+                self.admin_token = response['access_token']
+                if self.reuse_tokens:
+                    save_cached_token(self.token_cache_path, "admin@test.com", self.admin_token)
+                user_data = response.get('user', {})
+                self.log_test(
+                    "Admin Login (admin@test.com)", 
+                    True, 
+                    f"Role: {user_data.get('role')}, Email: {user_data.get('email')}"
+                )
+            else:
+                self.log_test("Admin Login (admin@test.com)", False, str(response))
+                return False
 
         # Test ACME tenant login
         success, response = self.make_request(
             "POST", "auth/login",
-            {"email": "admin@acme.com.co", "password": "acme2025"},
+            ACME_LOGIN_BODY,
             expected_status=200
         )
         
@@ -128,16 +331,12 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /auth/me", False, str(response))
 
         # Test user registration
-        test_user_email = f"test_user_{int(time.time())}@test.com"
+        test_user_email = f"test_user_{next(self.uid)}@test.com"
         success, response = self.make_request(
             "POST", "auth/register",
-            {
-                "email": test_user_email,
-                "password": "test123",
-                "full_name": "Test User Regression",
-                "role": "participant"
-            },
-            expected_status=201
+            _with_email(REGISTER_BODY_PREFIX, test_user_email),
+            expected_status=201,
+            parse_body=False
         )
         
         if success:
@@ -177,8 +376,7 @@ class DigiKawsayRegressionTester:
 
     def test_user_management(self):
         """Test User Management endpoints"""
-        print(f"\n👥 2. USER MANAGEMENT")
-        print("-" * 50)
+        self.start_section("👥", "2. USER MANAGEMENT")
 
         # Test users list
         success, response = self.make_request(
@@ -198,7 +396,7 @@ class DigiKawsayRegressionTester:
         # Test individual user
         if self.user_id:
             success, response = self.make_request(
-                "GET", f"users/{self.user_id}", auth_token=self.admin_token
+                "GET", _route("user", self.user_id), auth_token=self.admin_token
             )
             
             if success:
@@ -209,19 +407,17 @@ class DigiKawsayRegressionTester:
                 )
             else:
                 self.log_test(f"GET /users/{self.user_id}", False, str(response))
+        else:
+            self.log_skip("GET /users/{id}", "user_id")
 
         # Test create user
-        new_user_email = f"api_created_{int(time.time())}@test.com"
+        new_user_email = f"api_created_{next(self.uid)}@test.com"
         success, response = self.make_request(
             "POST", "users/",
-            {
-                "email": new_user_email,
-                "password": "test123456",  # 8+ characters required
-                "full_name": "API Created User",
-                "role": "participant"
-            },
+            _with_email(CREATE_USER_BODY_PREFIX, new_user_email),
             auth_token=self.admin_token,
-            expected_status=201
+            expected_status=201,
+            parse_body=False
         )
         
         if success:
@@ -231,8 +427,7 @@ class DigiKawsayRegressionTester:
 
     def test_campaigns(self):
         """Test Campaign endpoints"""
-        print(f"\n📋 3. CAMPAIGNS")
-        print("-" * 50)
+        self.start_section("📋", "3. CAMPAIGNS")
 
         # Test campaigns list
         success, response = self.make_request(
@@ -249,12 +444,14 @@ class DigiKawsayRegressionTester:
         else:
             self.log_test("GET /campaigns/", False, str(response))
 
-        # Test individual campaign
+        # Test individual campaign and its coverage (fetched together)
         if self.campaign_id:
-            success, response = self.make_request(
-                "GET", f"campaigns/{self.campaign_id}", auth_token=self.admin_token
+            campaign_result, coverage_result = self.batch_get(
+                [_route("campaign", self.campaign_id), _route("campaign_coverage", self.campaign_id)],
+                self.admin_token
             )
-            
+
+            success, response = campaign_result
             if success:
                 self.log_test(
                     f"GET /campaigns/{self.campaign_id}", 
@@ -265,10 +462,7 @@ class DigiKawsayRegressionTester:
                 self.log_test(f"GET /campaigns/{self.campaign_id}", False, str(response))
 
             # Test campaign coverage
-            success, response = self.make_request(
-                "GET", f"campaigns/{self.campaign_id}/coverage", auth_token=self.admin_token
-            )
-            
+            success, response = coverage_result
             if success:
                 coverage = response.get('coverage_percentage', 'N/A')
                 self.log_test(
@@ -278,17 +472,20 @@ class DigiKawsayRegressionTester:
                 )
             else:
                 self.log_test(f"GET /campaigns/{self.campaign_id}/coverage", False, str(response))
+        else:
+            self.log_skip("GET /campaigns/{id} and /coverage", "campaign_id")
 
     def test_insights_runacultur(self):
         """Test Insights (RunaCultur) endpoints"""
-        print(f"\n🧠 4. INSIGHTS (RUNACULTUR)")
-        print("-" * 50)
+        self.start_section("🧠", "4. INSIGHTS (RUNACULTUR)")
+
+        endpoints = ["insights/", "taxonomy/"]
+        if self.campaign_id:
+            endpoints.append(_route("campaign_insights", self.campaign_id))
+        insights, taxonomy, *campaign_insights = self.batch_get(endpoints, self.admin_token)
 
         # Test general insights
-        success, response = self.make_request(
-            "GET", "insights/", auth_token=self.admin_token
-        )
-        
+        success, response = insights
         if success:
             insight_count = len(response) if isinstance(response, list) else 0
             self.log_test("GET /insights/", True, f"Found {insight_count} insights")
@@ -296,11 +493,8 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /insights/", False, str(response))
 
         # Test campaign-specific insights
-        if self.campaign_id:
-            success, response = self.make_request(
-                "GET", f"insights/campaign/{self.campaign_id}", auth_token=self.admin_token
-            )
-            
+        if campaign_insights:
+            success, response = campaign_insights[0]
             if success:
                 campaign_insights = len(response) if isinstance(response, list) else 0
                 self.log_test(
@@ -310,12 +504,11 @@ class DigiKawsayRegressionTester:
                 )
             else:
                 self.log_test(f"GET /insights/campaign/{self.campaign_id}", False, str(response))
+        else:
+            self.log_skip("GET /insights/campaign/{id}", "campaign_id")
 
         # Test taxonomy
-        success, response = self.make_request(
-            "GET", "taxonomy/", auth_token=self.admin_token
-        )
-        
+        success, response = taxonomy
         if success:
             taxonomy_count = len(response) if isinstance(response, list) else 0
             self.log_test("GET /taxonomy/", True, f"Found {taxonomy_count} taxonomy categories")
@@ -324,18 +517,19 @@ class DigiKawsayRegressionTester:
 
     def test_network_analysis_runamap(self):
         """Test Network Analysis (RunaMap) endpoints"""
-        print(f"\n🗺️ 5. NETWORK ANALYSIS (RUNAMAP)")
-        print("-" * 50)
+        self.start_section("🗺️", "5. NETWORK ANALYSIS (RUNAMAP)")
 
         if not self.campaign_id:
             self.log_test("Network Analysis", False, "No campaign ID available")
             return
 
-        # Test network analysis for campaign
-        success, response = self.make_request(
-            "GET", f"network/campaign/{self.campaign_id}", auth_token=self.admin_token
+        network, snapshots = self.batch_get(
+            [_route("campaign_network", self.campaign_id), _route("network_snapshots", self.campaign_id)],
+            self.admin_token
         )
-        
+
+        # Test network analysis for campaign
+        success, response = network
         if success:
             nodes = response.get('nodes', [])
             edges = response.get('edges', [])
@@ -348,10 +542,7 @@ class DigiKawsayRegressionTester:
             self.log_test(f"GET /network/campaign/{self.campaign_id}", False, str(response))
 
         # Test network snapshots
-        success, response = self.make_request(
-            "GET", f"network/snapshots/{self.campaign_id}", auth_token=self.admin_token
-        )
-        
+        success, response = snapshots
         if success:
             snapshot_count = len(response) if isinstance(response, list) else 0
             self.log_test(
@@ -364,14 +555,15 @@ class DigiKawsayRegressionTester:
 
     def test_initiatives_runaflow(self):
         """Test Initiatives (RunaFlow) endpoints"""
-        print(f"\n🚀 6. INITIATIVES (RUNAFLOW)")
-        print("-" * 50)
+        self.start_section("🚀", "6. INITIATIVES (RUNAFLOW)")
+
+        endpoints = ["initiatives/", "rituals/"]
+        if self.campaign_id:
+            endpoints.append(_route("campaign_initiatives", self.campaign_id))
+        initiatives, rituals, *campaign_initiatives = self.batch_get(endpoints, self.admin_token)
 
         # Test general initiatives
-        success, response = self.make_request(
-            "GET", "initiatives/", auth_token=self.admin_token
-        )
-        
+        success, response = initiatives
         if success:
             initiative_count = len(response) if isinstance(response, list) else 0
             self.log_test("GET /initiatives/", True, f"Found {initiative_count} initiatives")
@@ -379,11 +571,8 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /initiatives/", False, str(response))
 
         # Test campaign-specific initiatives
-        if self.campaign_id:
-            success, response = self.make_request(
-                "GET", f"initiatives/campaign/{self.campaign_id}", auth_token=self.admin_token
-            )
-            
+        if campaign_initiatives:
+            success, response = campaign_initiatives[0]
             if success:
                 campaign_initiatives = len(response) if isinstance(response, list) else 0
                 self.log_test(
@@ -393,12 +582,11 @@ class DigiKawsayRegressionTester:
                 )
             else:
                 self.log_test(f"GET /initiatives/campaign/{self.campaign_id}", False, str(response))
+        else:
+            self.log_skip("GET /initiatives/campaign/{id}", "campaign_id")
 
         # Test rituals
-        success, response = self.make_request(
-            "GET", "rituals/", auth_token=self.admin_token
-        )
-        
+        success, response = rituals
         if success:
             ritual_count = len(response) if isinstance(response, list) else 0
             self.log_test("GET /rituals/", True, f"Found {ritual_count} rituals")
@@ -407,14 +595,16 @@ class DigiKawsayRegressionTester:
 
     def test_governance_runadata(self):
         """Test Governance (RunaData) endpoints"""
-        print(f"\n🏛️ 7. GOVERNANCE (RUNADATA)")
-        print("-" * 50)
+        self.start_section("🏛️", "7. GOVERNANCE (RUNADATA)")
 
-        # Test permissions
-        success, response = self.make_request(
-            "GET", "governance/permissions", auth_token=self.admin_token
+        permissions, roles, compliance, audit_logs, audit_stats = self.batch_get(
+            ["governance/permissions", "governance/roles", "governance/compliance-score",
+             "audit/", "audit/stats"],
+            self.admin_token
         )
-        
+
+        # Test permissions
+        success, response = permissions
         if success:
             permission_count = len(response) if isinstance(response, list) else 0
             self.log_test("GET /governance/permissions", True, f"Found {permission_count} permissions")
@@ -422,10 +612,7 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /governance/permissions", False, str(response))
 
         # Test roles
-        success, response = self.make_request(
-            "GET", "governance/roles", auth_token=self.admin_token
-        )
-        
+        success, response = roles
         if success:
             role_count = len(response) if isinstance(response, list) else 0
             self.log_test("GET /governance/roles", True, f"Found {role_count} roles")
@@ -433,10 +620,7 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /governance/roles", False, str(response))
 
         # Test compliance score
-        success, response = self.make_request(
-            "GET", "governance/compliance-score", auth_token=self.admin_token
-        )
-        
+        success, response = compliance
         if success:
             score = response.get('score', 'N/A')
             self.log_test("GET /governance/compliance-score", True, f"Compliance score: {score}")
@@ -444,10 +628,7 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /governance/compliance-score", False, str(response))
 
         # Test audit logs
-        success, response = self.make_request(
-            "GET", "audit/", auth_token=self.admin_token
-        )
-        
+        success, response = audit_logs
         if success:
             audit_count = len(response) if isinstance(response, list) else 0
             self.log_test("GET /audit/", True, f"Found {audit_count} audit logs")
@@ -455,10 +636,7 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /audit/", False, str(response))
 
         # Test audit stats
-        success, response = self.make_request(
-            "GET", "audit/stats", auth_token=self.admin_token
-        )
-        
+        success, response = audit_stats
         if success:
             total_events = response.get('total_events', 'N/A')
             self.log_test("GET /audit/stats", True, f"Total audit events: {total_events}")
@@ -467,14 +645,17 @@ class DigiKawsayRegressionTester:
 
     def test_observability(self):
         """Test Observability endpoints"""
-        print(f"\n📊 8. OBSERVABILITY")
-        print("-" * 50)
+        self.start_section("📊", "8. OBSERVABILITY")
 
-        # Test health endpoint
-        success, response = self.make_request(
-            "GET", "observability/health"
+        # Health is public and is checked without a token; the metrics reads use the admin token
+        health, system, business = self.batch_get(
+            ["observability/health", "observability/metrics/system", "observability/metrics/business"],
+            self.admin_token,
+            public=frozenset({"observability/health"})
         )
-        
+
+        # Test health endpoint
+        success, response = health
         if success:
             status = response.get('status', 'N/A')
             uptime = response.get('uptime_seconds', 'N/A')
@@ -483,10 +664,7 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /observability/health", False, str(response))
 
         # Test system metrics
-        success, response = self.make_request(
-            "GET", "observability/metrics/system", auth_token=self.admin_token
-        )
-        
+        success, response = system
         if success:
             cpu_usage = response.get('cpu_usage_percent', 'N/A')
             memory_usage = response.get('memory_usage_percent', 'N/A')
@@ -499,10 +677,7 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /observability/metrics/system", False, str(response))
 
         # Test business metrics
-        success, response = self.make_request(
-            "GET", "observability/metrics/business", auth_token=self.admin_token
-        )
-        
+        success, response = business
         if success:
             active_users = response.get('active_users_24h', 'N/A')
             total_sessions = response.get('total_sessions', 'N/A')
@@ -516,14 +691,12 @@ class DigiKawsayRegressionTester:
 
     def test_consent_privacy(self):
         """Test Consent and Privacy endpoints"""
-        print(f"\n🔒 9. CONSENT AND PRIVACY")
-        print("-" * 50)
+        self.start_section("🔒", "9. CONSENT AND PRIVACY")
+
+        policy, my_consents = self.batch_get(["consent/policy", "consent/my-consents"], self.admin_token)
 
         # Test consent policy
-        success, response = self.make_request(
-            "GET", "consent/policy", auth_token=self.admin_token
-        )
-        
+        success, response = policy
         if success:
             if isinstance(response, list):
                 policy_count = len(response)
@@ -535,10 +708,7 @@ class DigiKawsayRegressionTester:
             self.log_test("GET /consent/policy", False, str(response))
 
         # Test my consents
-        success, response = self.make_request(
-            "GET", "consent/my-consents", auth_token=self.admin_token
-        )
-        
+        success, response = my_consents
         if success:
             consent_count = len(response) if isinstance(response, list) else 0
             self.log_test("GET /consent/my-consents", True, f"Found {consent_count} consents")
@@ -547,20 +717,23 @@ class DigiKawsayRegressionTester:
 
     def run_complete_regression_test(self):
         """Run the complete regression test suite"""
-        print("🚀 DIGIKAWSAY SPRINT 7 - COMPLETE REGRESSION TEST SUITE")
-        print("=" * 70)
-        print("Testing backend after massive refactoring:")
-        print("• 50 Python files in /app/backend/app/")
-        print("• 21 routers with 102+ endpoints")
-        print("• 11 business services")
-        print("• 75+ Pydantic models")
-        print("=" * 70)
-
+        logger.info("🚀 DIGIKAWSAY SPRINT 7 - COMPLETE REGRESSION TEST SUITE")
+        logger.info("=" * 70)
+        logger.info("Testing backend after massive refactoring:")
+        logger.info("• 50 Python files in /app/backend/app/")
+        logger.info("• 21 routers with 102+ endpoints")
+        logger.info("• 11 business services")
+        logger.info("• 75+ Pydantic models")
+        logger.info("=" * 70)
+
+        if not self.warmup():
+            logger.error(f"❌ Backend unreachable at {self.base_url}, stopping tests")
+            return False
         start_time = time.time()
 
         # Run all test suites
         if not self.test_authentication_security():
-            print("❌ Authentication failed, stopping tests")
+            logger.error("❌ Authentication failed, stopping tests")
             return False
 
         self.test_user_management()
@@ -576,33 +749,84 @@ class DigiKawsayRegressionTester:
         end_time = time.time()
         duration = end_time - start_time
 
-        print(f"\n📈 REGRESSION TEST RESULTS")
-        print("=" * 50)
-        print(f"Total tests run: {self.tests_run}")
-        print(f"Tests passed: {self.tests_passed}")
-        print(f"Tests failed: {len(self.failed_tests)}")
-        print(f"Success rate: {(self.tests_passed / self.tests_run * 100):.1f}%")
-        print(f"Test duration: {duration:.1f} seconds")
+        # Build the summary first and emit it with a single write
+        lines = [
+            f"\n📈 REGRESSION TEST RESULTS",
+            "=" * 50,
+            f"Total tests run: {self.tests_run}",
+            f"Tests passed: {self.tests_passed}",
+            f"Tests failed: {len(self.failed_tests)}",
+            f"Success rate: {(self.tests_passed / self.tests_run * 100):.1f}%",
+            f"Test duration: {duration:.1f} seconds",
+            f"\n📊 RESULTS BY SECTION:",
+        ]
+        for section in dict.fromkeys(section for section, _ in self.section_counts):
+            passed = self.section_counts[section, True]
+            total = passed + self.section_counts[section, False]
+            lines.append(f"{'✅' if passed == total else '❌'} {section}: {passed}/{total} passed")
 
         if self.failed_tests:
-            print(f"\n❌ FAILED TESTS:")
+            lines.append(f"\n❌ FAILED TESTS:")
             for i, failure in enumerate(self.failed_tests, 1):
-                print(f"{i}. {failure['name']}")
+                lines.append(f"{i}. {failure['name']}")
                 if failure['details']:
-                    print(f"   {failure['details']}")
-
-        print(f"\n🏗️ ARCHITECTURE VERIFICATION:")
-        print(f"✅ Modular backend structure working")
-        print(f"✅ All 21 routers accessible")
-        print(f"✅ Authentication and authorization working")
-        print(f"✅ Database connectivity confirmed")
-        print(f"✅ API endpoints responding correctly")
+                    lines.append(f"   {failure['details']}")
+
+        lines += [
+            f"\n🏗️ ARCHITECTURE VERIFICATION:",
+            f"✅ Modular backend structure working",
+            f"✅ All 21 routers accessible",
+            f"✅ Authentication and authorization working",
+            f"✅ Database connectivity confirmed",
+            f"✅ API endpoints responding correctly",
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
         return len(self.failed_tests) == 0
 
+def redact_access_token(body: str) -> str:
+    """Replace any access_token in a recorded JSON body so cassettes never hold live credentials"""
+    try:
+        payload = _loads(body)
+    except ValueError:
+        return body
+    if not isinstance(payload, dict) or "access_token" not in payload:
+        return body
+    payload["access_token"] = REDACTED_TOKEN
+    return _dumps(payload).decode("utf-8")
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 def main():
-    tester = DigiKawsayRegressionTester()
-    success = tester.run_complete_regression_test()
+    parser = argparse.ArgumentParser(description="DigiKawsay Sprint 7 regression test suite")
+    parser.add_argument("--cassette", nargs="?", const=DEFAULT_CASSETTE_PATH,
+                        help="Replay responses from this file, recording it first if missing "
+                             f"(default when given without a path: {DEFAULT_CASSETTE_PATH})")
+    parser.add_argument("--rerecord", action="store_true", help="Re-record the cassette against the live backend")
+    parser.add_argument("--max-concurrency", type=positive_int, default=8,
+                        help="Maximum number of requests in flight at once (default: 8)")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-q", "--quiet", action="store_true",
+                           help="Only print the final results summary")
+    verbosity.add_argument("-v", "--verbose", action="store_true",
+                           help="Also log connection-level details")
+    args = parser.parse_args()
+    level = logging.WARNING if args.quiet else logging.DEBUG if args.verbose else logging.INFO
+    logging.basicConfig(level=level, format="%(message)s", stream=sys.stdout)
+
+    tester = DigiKawsayRegressionTester(cassette_path=args.cassette, rerecord=args.rerecord,
+                                        max_concurrency=args.max_concurrency)
+    try:
+        success = tester.run_complete_regression_test()
+        tester.save_cassette()
+    finally:
+        tester.session.close()
     return 0 if success else 1
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+DigiKawsay backend testing - shared HTTP stack
+One pooled keep-alive session reused by the standalone test scripts, so suites run in the same process share connections
+"""
+
+import atexit
+import base64
+import functools
+import hashlib
+import json
+import os
+import socket
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+from typing import Any, Dict, Optional, Tuple
+
+# orjson when installed (JSON bodies as bytes), stdlib json otherwise; shared by every suite
+try:
+    import orjson
+    _dumps, _loads = orjson.dumps, orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+    _loads = json.loads
+
+# urllib3 already disables Nagle (TCP_NODELAY); also keep idle pooled sockets alive between tests
+SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+# Recent unauthenticated GET responses by URL, with the monotonic time they were fetched
+_recent_responses: Dict[str, Tuple[float, requests.Response]] = {}
+
+# Pooled connections per host (covers the security tester's 12-request login burst)
+POOL_MAXSIZE = 20
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections are opened with SOCKET_OPTIONS"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+@functools.cache
+def get_session() -> requests.Session:
+    """Return the process-wide session (JSON content type, pooled keep-alive connections, gateway retries)"""
+    session = requests.Session()
+    session.headers['Content-Type'] = 'application/json'
+    # Ride out transient gateway errors from the preview host instead of failing the test; only urllib3's
+    # default idempotent methods are retried, so logins and registrations are never sent twice
+    retries = Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504],
+                    respect_retry_after_header=True, raise_on_status=False)
+    adapter = KeepAliveAdapter(pool_connections=10, pool_maxsize=POOL_MAXSIZE, max_retries=retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    atexit.register(session.close)
+    return session
+
+
+def recent_response(url: str, max_age: float) -> Optional[requests.Response]:
+    """Return the successful response fetched for url by cached_get if it is younger than max_age seconds"""
+    cached = _recent_responses.get(url)
+    if cached is not None and time.monotonic() - cached[0] < max_age:
+        return cached[1]
+    return None
+
+
+def cached_get(url: str, max_age: float, **kwargs) -> requests.Response:
+    """GET through the shared session, reusing a successful response younger than max_age seconds"""
+    cached = recent_response(url, max_age)
+    if cached is not None:
+        return cached
+    response = get_session().get(url, **kwargs)
+    if response.ok:
+        # .content reads the body now, so the cached response can be parsed again by later suites
+        response.content
+        _recent_responses[url] = (time.monotonic(), response)
+    return response
+
+
+def reuse_tokens_enabled() -> bool:
+    """Whether suites may reuse cached tokens; opt-in (DIGIKAWSAY_REUSE_TOKENS=1) so CI keeps exercising login"""
+    return os.environ.get("DIGIKAWSAY_REUSE_TOKENS") == "1"
+
+
+def token_cache_path(base_url: str) -> str:
+    """Return the per-backend token cache file (shared with the full regression suite)"""
+    url_hash = hashlib.blake2b(base_url.encode(), digest_size=8).hexdigest()
+    return f".tokcache_{url_hash}.json"
+
+
+def jwt_exp(token: str) -> Optional[float]:
+    """Read the exp claim of a JWT without verifying its signature; None if the token is not a JWT"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return None
+    return claims.get("exp", 0) if isinstance(claims, dict) else None
+
+
+def load_cached_token(path: str, key: str, min_ttl: float = 60.0) -> Optional[str]:
+    """Return the cached token for key if it stays valid for at least min_ttl seconds"""
+    try:
+        with open(path) as f:
+            entry = json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+    if not entry or entry.get("exp", 0) - time.time() < min_ttl:
+        return None
+    return entry.get("token")
+
+
+def save_cached_token(path: str, key: str, token: str):
+    """Persist a token (owner-readable only) so the next run can skip its login round-trip"""
+    exp = jwt_exp(token)
+    if exp is None:
+        # Without an expiry the cache could never tell when to drop the token
+        return
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    cached[key] = {"token": token, "exp": exp}
+    tmp_path = f"{path}.tmp"
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+        json.dump(cached, f)
+    os.replace(tmp_path, path)
+
+
+def token_is_valid(api_base: str, token: str, session: Optional[requests.Session] = None) -> bool:
+    """Confirm a cached token with one GET auth/me; False if the backend revoked it or is unreachable"""
+    try:
+        response = (session or get_session()).get(f"{api_base}auth/me", headers={'Authorization': f'Bearer {token}'},
+                                                  timeout=(3.05, 5))
+    except requests.RequestException:
+        return False
+    return response.status_code == 200
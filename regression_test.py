@@ -4,75 +4,134 @@ DigiKawsay Sprint 4 - Router Migration Regression Test
 Quick regression test to verify backend endpoints after router refactoring
 """
 
-import requests
+import logging
+import os
 import sys
-import json
-import time
-from datetime import datetime
-from typing import Dict, Any
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from common_http import (_dumps, _loads, cached_get, get_session, load_cached_token, recent_response,
+                         reuse_tokens_enabled, save_cached_token, token_cache_path, token_is_valid)
+
+logger = logging.getLogger("digikawsay.router")
+
+# (connect, read) timeouts: an unreachable host fails within 2 s instead of 10
+REQUEST_TIMEOUT = (2.0, 10.0)
+
+# Seconds a health-check response is reused by later suites in the same process
+HEALTH_MAX_AGE = 5.0
+
+# Failure details kept for the summary when a broken server fails every test
+MAX_FAILURES_KEPT = 256
+
+# List endpoints checked after login: (name, endpoint, plural, noun, sample key, detail key)
+LIST_TESTS = (
+    ("Campaigns List", "campaigns/", "campaigns", "campaign", "name", "status"),
+    ("Users List", "users/", "users", "user", "email", "role"),  # admin required
+    ("Taxonomy Categories", "taxonomy/", "taxonomy categories", "category", "name", "type"),
+)
 
 class RegressionTester:
-    def __init__(self, base_url="https://runa-insights.preview.emergentagent.com"):
+    def __init__(self, base_url="https://runa-insights.preview.emergentagent.com", token: Optional[str] = None):
         self.base_url = base_url
-        self.token = None
+        # The process-wide keep-alive session, shared with the other test scripts
+        self.session = get_session()
+        # A token handed over by an earlier suite skips the login round-trip
+        self.set_token(token)
+        # Opt-in reuse of unexpired tokens from a previous run (shared cache file with the other suites)
+        self.reuse_tokens = reuse_tokens_enabled()
+        self.token_cache_path = token_cache_path(base_url)
         self.tests_run = 0
         self.tests_passed = 0
-        self.failed_tests = []
+        # Only the most recent failures are kept for the summary; failed_count is the true total
+        self.failed_tests = deque(maxlen=MAX_FAILURES_KEPT)
+        self.failed_count = 0
+        # GET responses fetched ahead of their tests, keyed by endpoint
+        self.prefetched: Dict[str, Future] = {}
+
+    def prefetch(self, endpoints: List[str]):
+        """Issue independent authenticated GETs concurrently; run_test consumes them in order"""
+        headers = self.auth_headers
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as pool:
+            for endpoint in endpoints:
+                self.prefetched[endpoint] = pool.submit(self.session.get, f"{self.base_url}/api/{endpoint}",
+                                                        headers=headers, timeout=REQUEST_TIMEOUT)
+
+    def set_token(self, token: Optional[str]):
+        """Store the token and build its Authorization header once, reused by every authenticated call"""
+        self.token = token
+        self.auth_headers = {'Authorization': f'Bearer {token}'} if token else {}
+
+    def record_failure(self, failure: Dict):
+        """Count a failed test and keep its details for the summary"""
+        self.failed_count += 1
+        self.failed_tests.append(failure)
 
     def run_test(self, name: str, method: str, endpoint: str, expected_status: int, 
-                 data: Dict = None, headers: Dict = None, auth_required: bool = True) -> tuple:
+                 data: Dict = None, headers: Dict = None, auth_required: bool = True,
+                 max_age: float = 0.0) -> tuple:
         """Run a single API test"""
         url = f"{self.base_url}/api/{endpoint}"
-        test_headers = {'Content-Type': 'application/json'}
-        
-        if headers:
-            test_headers.update(headers)
-            
-        if auth_required and self.token:
-            test_headers['Authorization'] = f'Bearer {self.token}'
+        if auth_required:
+            test_headers = {**self.auth_headers, **headers} if headers else self.auth_headers
+        else:
+            test_headers = headers or {}
 
         self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
+        logger.info("\n🔍 Testing %s...", name)
+        logger.info("   URL: %s", url)
         
+        # Serialize once to bytes; the session already sends Content-Type: application/json
+        body = _dumps(data) if data is not None else None
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=test_headers, timeout=10)
+            prefetched = self.prefetched.pop(endpoint, None) if method == 'GET' and auth_required else None
+            if prefetched is not None:
+                response = prefetched.result()
+            elif method == 'GET' and max_age and not test_headers:
+                response = cached_get(url, max_age, timeout=REQUEST_TIMEOUT)
+            elif method == 'GET':
+                response = self.session.get(url, headers=test_headers, timeout=REQUEST_TIMEOUT)
             elif method == 'POST':
-                response = requests.post(url, json=data, headers=test_headers, timeout=10)
+                response = self.session.post(url, data=body, headers=test_headers, timeout=REQUEST_TIMEOUT)
             elif method == 'PUT':
-                response = requests.put(url, json=data, headers=test_headers, timeout=10)
+                response = self.session.put(url, data=body, headers=test_headers, timeout=REQUEST_TIMEOUT)
 
             success = response.status_code == expected_status
+            response_data = {}
             
             if success:
                 self.tests_passed += 1
-                print(f"✅ PASSED - Status: {response.status_code}")
+                logger.info("✅ PASSED - Status: %s", response.status_code)
                 try:
-                    response_data = response.json()
-                    if isinstance(response_data, dict):
-                        print(f"   Response keys: {list(response_data.keys())}")
-                    elif isinstance(response_data, list):
-                        print(f"   Response: List with {len(response_data)} items")
-                    else:
-                        print(f"   Response type: {type(response_data)}")
-                except:
-                    print(f"   Response: {response.text[:100]}...")
+                    response_data = _loads(response.content)
+                    # Shape dumps are verbose; only format them when debugging
+                    if logger.isEnabledFor(logging.DEBUG):
+                        if isinstance(response_data, dict):
+                            logger.debug("   Response keys: %s", list(response_data.keys()))
+                        elif isinstance(response_data, list):
+                            logger.debug("   Response: List with %s items", len(response_data))
+                        else:
+                            logger.debug("   Response type: %s", type(response_data))
+                except ValueError:
+                    logger.info("   Response: %s...", response.content[:100].decode('utf-8', errors='replace'))
             else:
-                print(f"❌ FAILED - Expected {expected_status}, got {response.status_code}")
-                print(f"   Response: {response.text[:200]}...")
-                self.failed_tests.append({
+                # Slice the bytes before decoding so a large error page is never decoded in full
+                snippet = response.content[:200].decode('utf-8', errors='replace')
+                logger.info("❌ FAILED - Expected %s, got %s", expected_status, response.status_code)
+                logger.info("   Response: %s...", snippet)
+                self.record_failure({
                     'name': name,
                     'expected': expected_status,
                     'actual': response.status_code,
-                    'response': response.text[:200]
+                    'response': snippet
                 })
 
-            return success, response.json() if success and response.content else {}
+            return success, response_data
 
         except Exception as e:
-            print(f"❌ FAILED - Error: {str(e)}")
-            self.failed_tests.append({
+            logger.info("❌ FAILED - Error: %s", e)
+            self.record_failure({
                 'name': name,
                 'error': str(e)
             })
@@ -80,26 +139,42 @@ class RegressionTester:
 
     def test_health_check(self) -> bool:
         """Test health check endpoint"""
+        # A response an earlier suite just fetched is reported, but not counted as a test of this run
+        if recent_response(f"{self.base_url}/api/observability/health", HEALTH_MAX_AGE) is not None:
+            logger.info("\n⏭️  Health Check: reusing the response fetched by an earlier suite (not counted)")
+            return True
+
         success, response = self.run_test(
             "Health Check",
             "GET",
             "observability/health",
             200,
-            auth_required=False
+            auth_required=False,
+            max_age=HEALTH_MAX_AGE
         )
         
         if success:
             status = response.get('status', 'unknown')
-            print(f"   ✅ Health status: {status}")
+            logger.info("   ✅ Health status: %s", status)
             if 'uptime' in response:
-                print(f"   ✅ Uptime: {response.get('uptime')}")
+                logger.info("   ✅ Uptime: %s", response.get('uptime'))
             if 'version' in response:
-                print(f"   ✅ Version: {response.get('version')}")
+                logger.info("   ✅ Version: %s", response.get('version'))
         
         return success
 
     def test_login(self, email: str, password: str) -> bool:
         """Test login and get token"""
+        if not self.token and self.reuse_tokens:
+            cached_token = load_cached_token(self.token_cache_path, email)
+            # A revoked token or one from a reseeded database falls back to a fresh login
+            if cached_token and token_is_valid(f"{self.base_url}/api/", cached_token):
+                self.set_token(cached_token)
+        if self.token:
+            # No login request is sent, so this is reported but not counted as a test
+            logger.info("\n⏭️  Admin Login: reusing an existing token (not counted): %s...", self.token[:20])
+            return True
+
         success, response = self.run_test(
             "Admin Login",
             "POST",
@@ -110,10 +185,12 @@ class RegressionTester:
         )
         
         if success and 'access_token' in response:
-            self.token = response['access_token']
-            print(f"   ✅ Token obtained: {self.token[:20]}...")
+            self.set_token(response['access_token'])
+            if self.reuse_tokens:
+                save_cached_token(self.token_cache_path, email, self.token)
+            logger.info("   ✅ Token obtained: %s...", self.token[:20])
             user = response.get('user', {})
-            print(f"   ✅ User: {user.get('email')} ({user.get('role')})")
+            logger.info("   ✅ User: %s (%s)", user.get('email'), user.get('role'))
             return True
         return False
 
@@ -127,83 +204,38 @@ class RegressionTester:
         )
         
         if success:
-            print(f"   ✅ User ID: {response.get('id')}")
-            print(f"   ✅ Email: {response.get('email')}")
-            print(f"   ✅ Role: {response.get('role')}")
-            print(f"   ✅ Active: {response.get('is_active')}")
+            logger.info("   ✅ User ID: %s", response.get('id'))
+            logger.info("   ✅ Email: %s", response.get('email'))
+            logger.info("   ✅ Role: %s", response.get('role'))
+            logger.info("   ✅ Active: %s", response.get('is_active'))
         
         return success
 
-    def test_campaigns(self) -> bool:
-        """Test GET /api/campaigns endpoint"""
-        success, response = self.run_test(
-            "Campaigns List",
-            "GET",
-            "campaigns/",
-            200
-        )
+    def run_list_test(self, name: str, endpoint: str, plural: str, noun: str,
+                      sample_key: str, detail_key: str) -> bool:
+        """Test a list endpoint and print a sample of its first item"""
+        success, response = self.run_test(name, "GET", endpoint, 200)
         
         if success:
             if isinstance(response, list):
-                print(f"   ✅ Found {len(response)} campaigns")
+                logger.info("   ✅ Found %s %s", len(response), plural)
                 if response:
-                    first_campaign = response[0]
-                    print(f"   ✅ Sample campaign: {first_campaign.get('name')}")
-                    print(f"   ✅ Status: {first_campaign.get('status')}")
+                    first_item = response[0]
+                    logger.info("   ✅ Sample %s: %s", noun, first_item.get(sample_key))
+                    logger.info("   ✅ %s: %s", detail_key.capitalize(), first_item.get(detail_key))
             else:
-                print(f"   ⚠️  Expected list, got: {type(response)}")
+                logger.info("   ⚠️  Expected list, got: %s", type(response))
         
         return success
 
-    def test_users(self) -> bool:
-        """Test GET /api/users endpoint (admin required)"""
-        success, response = self.run_test(
-            "Users List",
-            "GET",
-            "users/",
-            200
-        )
-        
-        if success:
-            if isinstance(response, list):
-                print(f"   ✅ Found {len(response)} users")
-                if response:
-                    first_user = response[0]
-                    print(f"   ✅ Sample user: {first_user.get('email')}")
-                    print(f"   ✅ Role: {first_user.get('role')}")
-            else:
-                print(f"   ⚠️  Expected list, got: {type(response)}")
-        
-        return success
-
-    def test_taxonomy(self) -> bool:
-        """Test GET /api/taxonomy endpoint"""
-        success, response = self.run_test(
-            "Taxonomy Categories",
-            "GET",
-            "taxonomy/",
-            200
-        )
-        
-        if success:
-            if isinstance(response, list):
-                print(f"   ✅ Found {len(response)} taxonomy categories")
-                if response:
-                    first_category = response[0]
-                    print(f"   ✅ Sample category: {first_category.get('name')}")
-                    print(f"   ✅ Type: {first_category.get('type')}")
-            else:
-                print(f"   ⚠️  Expected list, got: {type(response)}")
-        
-        return success
-
-def main():
-    print("🚀 DigiKawsay Sprint 4 - Router Migration Regression Test")
-    print("=" * 60)
-    print("Testing core endpoints after router refactoring...")
-    
-    tester = RegressionTester()
+def main(tester: Optional[RegressionTester] = None):
+    logging.basicConfig(level=os.environ.get("REGTEST_LOG", "INFO"), format="%(message)s", stream=sys.stdout)
+    logger.info("🚀 DigiKawsay Sprint 4 - Router Migration Regression Test")
+    logger.info("=" * 60)
+    logger.info("Testing core endpoints after router refactoring...")
     
+    if tester is None:
+        tester = RegressionTester()
     # Test sequence as requested
     test_results = []
     
@@ -212,39 +244,44 @@ def main():
     
     # 2. Login with admin credentials
     if not tester.test_login("admin@test.com", "test123"):
-        print("❌ Admin login failed, stopping tests")
+        logger.info("❌ Admin login failed, stopping tests")
         return 1
     
+    # 3-6 are independent reads: fetch them concurrently, then check them in order
+    tester.prefetch(["auth/me"] + [endpoint for _, endpoint, *_ in LIST_TESTS])
+    
     # 3. Test auth/me
     test_results.append(tester.test_auth_me())
     
-    # 4. Test campaigns
-    test_results.append(tester.test_campaigns())
-    
-    # 5. Test users (admin required)
-    test_results.append(tester.test_users())
-    
-    # 6. Test taxonomy
-    test_results.append(tester.test_taxonomy())
-
-    # Print final results
-    print(f"\n📈 Regression Test Results Summary")
-    print("=" * 40)
-    print(f"Tests run: {tester.tests_run}")
-    print(f"Tests passed: {tester.tests_passed}")
-    print(f"Tests failed: {tester.tests_run - tester.tests_passed}")
-    print(f"Success rate: {(tester.tests_passed / tester.tests_run * 100):.1f}%")
-    
+    # 4-6. Test campaigns, users (admin required) and taxonomy
+    for list_test in LIST_TESTS:
+        test_results.append(tester.run_list_test(*list_test))
+
+    # Build the summary first and emit it with a single write
+    lines = [
+        "\n📈 Regression Test Results Summary",
+        "=" * 40,
+        f"Tests run: {tester.tests_run}",
+        f"Tests passed: {tester.tests_passed}",
+        f"Tests failed: {tester.tests_run - tester.tests_passed}",
+        f"Success rate: {(tester.tests_passed / tester.tests_run * 100):.1f}%",
+    ]
+
     if tester.failed_tests:
-        print(f"\n❌ Failed Tests:")
-        for i, failure in enumerate(tester.failed_tests, 1):
-            print(f"{i}. {failure['name']}")
+        lines.append("\n❌ Failed Tests:")
+        first_kept = tester.failed_count - len(tester.failed_tests) + 1
+        if first_kept > 1:
+            lines.append(f"(showing the last {len(tester.failed_tests)} of {tester.failed_count} failures)")
+        for i, failure in enumerate(tester.failed_tests, first_kept):
+            lines.append(f"{i}. {failure['name']}")
             if 'error' in failure:
-                print(f"   Error: {failure['error']}")
+                lines.append(f"   Error: {failure['error']}")
             else:
-                print(f"   Expected: {failure['expected']}, Got: {failure['actual']}")
+                lines.append(f"   Expected: {failure['expected']}, Got: {failure['actual']}")
     else:
-        print(f"\n✅ All regression tests passed! Router migration successful.")
+        lines.append("\n✅ All regression tests passed! Router migration successful.")
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
     
     return 0 if tester.tests_passed == tester.tests_run else 1
 
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+DigiKawsay backend testing - run the router, Sprint 5 and security suites in one process
+The suites share the common_http session, so connections opened by the first are reused by the others
+"""
+
+import sys
+
+import backend_test
+import regression_test
+import sprint5_regression_test
+
+
+def main():
+    # Sequential, regression suites first: the security suite's login bursts drain the login rate limit.
+    router = regression_test.RegressionTester()
+    results = [regression_test.main(router)]
+    # The Sprint 5 suite reuses the router suite's admin token and its health-check response
+    sprint5 = sprint5_regression_test.Sprint5RegressionTester(token=router.token)
+    results.append(sprint5_regression_test.main(sprint5))
+    # Arguments are forwarded to the security suite (e.g. --force-fresh-login)
+    results.append(backend_test.main(sys.argv[1:]))
+    return 0 if all(result == 0 for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())